@@ -0,0 +1,138 @@
+"""
+Persistent store of tokenization results, to avoid re-tokenizing the same forms with the
+same profile, rules and column across runs.
+"""
+from __future__ import unicode_literals, print_function
+import sqlite3
+import hashlib
+
+# Part of every cache key. Increase it whenever a change to the library changes tokenization
+# results, so that results computed by earlier versions are not returned anymore.
+CACHE_VERSION = 1
+
+
+class ResultCache(object):
+    """
+    SQLite-backed cache of the results of Tokenizer.tokenize.
+
+    Results are stored under a key computed from CACHE_VERSION and the profile, the rules
+    and the column the tokenizer was set up with. Changing any of these therefore
+    invalidates all previously stored results; they are not returned anymore and can be
+    removed with purge.
+
+    Parameters
+    ----------
+
+    filename : string
+        Path of the SQLite database file; created if it does not exist.
+
+    tokenizer : Tokenizer
+        The tokenizer to compute results with.
+
+    column : str (default = "graphemes")
+        The column label for the transformation, as in Tokenizer.tokenize.
+    """
+    # SQLite limits the number of parameters per statement to 999 by default.
+    chunksize = 500
+
+    def __init__(self, filename, tokenizer, column="graphemes"):
+        self.tokenizer = tokenizer
+        self.column = column
+        self.key = fingerprint(tokenizer, column)
+        self.db = sqlite3.connect(filename)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            "(key TEXT, form TEXT, result TEXT, PRIMARY KEY (key, form))")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_many(self, forms):
+        """
+        Return a dict mapping the forms for which a result is stored to the result.
+        """
+        forms = list(set(forms))
+        result = {}
+        for i in range(0, len(forms), self.chunksize):
+            chunk = forms[i:i + self.chunksize]
+            result.update(self.db.execute(
+                "SELECT form, result FROM results WHERE key = ? AND form IN (%s)"
+                % ", ".join("?" * len(chunk)),
+                [self.key] + chunk))
+        return result
+
+    def set_many(self, results):
+        """
+        Store results, a dict mapping forms to results.
+        """
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO results (key, form, result) VALUES (?, ?, ?)",
+                ((self.key, form, result) for form, result in results.items()))
+
+    def tokenize(self, forms):
+        """
+        Tokenize forms, looking up stored results first and storing the new ones.
+
+        Results for which the tokenizer hit one of its limits (see Tokenizer) are returned
+        but not stored, since they depend on timing and configuration.
+
+        Returns
+        -------
+        result : list of str
+            The results, in the order of forms.
+        """
+        forms = list(forms)
+        results = self.get_many(forms)
+        new = {}
+        for form in forms:
+            if form not in results and form not in new:
+                exceeded = sum(self.tokenizer.limits_exceeded.values())
+                res = self.tokenizer.tokenize(form, self.column)
+                if sum(self.tokenizer.limits_exceeded.values()) == exceeded:
+                    new[form] = res
+                else:
+                    results[form] = res
+        self.set_many(new)
+        results.update(new)
+        return [results[form] for form in forms]
+
+    def purge(self):
+        """
+        Remove all results stored under keys other than the current one.
+        """
+        with self.db:
+            self.db.execute("DELETE FROM results WHERE key != ?", (self.key,))
+
+
+def fingerprint(tokenizer, column="graphemes"):
+    """
+    Return a hash of everything the results of tokenizer.tokenize(..., column) depend on.
+    """
+    digest = hashlib.sha1()
+
+    def update(*values):
+        for value in values:
+            digest.update(value.encode('utf8'))
+            digest.update(b'\0')
+        digest.update(b'\1')
+
+    update('%s' % CACHE_VERSION)
+    update(column.lower())
+    profile = tokenizer.profile
+    if profile:
+        update(*profile.column_labels)
+        for grapheme in profile:
+            update(grapheme, *[
+                profile.mappings.get((grapheme, label), '') for label in profile.column_labels])
+    update('rules')
+    if tokenizer.orthography_profile_rules:
+        for rule in tokenizer.parsed_rules:
+            update(rule.pattern, rule.replacement)
+    return digest.hexdigest()
@@ -0,0 +1,112 @@
+from __future__ import unicode_literals, print_function
+
+import six
+
+from orthotokenizer.util import normalized_rows
+
+
+class Profile(object):
+    """
+    An orthography profile, read once and shared by the trie, the grapheme set and the
+    mappings of the Tokenizer.
+
+    Parameters
+    ----------
+
+    rows : iterable
+        The NFD-normalized rows of the profile as lists of column values, without blank
+        rows and comments. If the first row starts with "graphemes", it is taken as the
+        column header. Use the from_* constructors to read profiles from other sources.
+    """
+
+    def __init__(self, rows):
+        # column labels from the orthography profile header
+        self.column_labels = []
+
+        # look up table of graphemes to other column transforms
+        self.mappings = {}
+
+        # the graphemes of the profile, in order
+        self.graphemes = {}
+        self._order = []
+
+        for i, tokens in enumerate(rows):
+            if i == 0 and tokens[0].lower().startswith("graphemes"):
+                # deal with the columns header -- should always start with "graphemes" as
+                # per the orthography profiles specification
+                self.column_labels.extend([token.lower() for token in tokens])
+                continue
+
+            grapheme = tokens[0]
+
+            # check for duplicates in the orthography profile (fail if dups)
+            if grapheme in self.graphemes:
+                raise Exception("You have a duplicate in your orthography profile.")
+            self.graphemes[grapheme] = 1
+            self._order.append(grapheme)
+
+            if len(tokens) == 1:
+                continue
+
+            self.mappings.update(
+                {(grapheme, label): token
+                 for token, label in zip(tokens, self.column_labels)})
+
+    def __iter__(self):
+        """
+        Iterate over the graphemes of the profile in the order they were specified.
+        """
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    @classmethod
+    def from_file(cls, filename):
+        return cls(normalized_rows(filename, '\t'))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Create a profile from an iterable of rows, given as lists of column values or as
+        tab-separated strings. Rows are parsed exactly like the lines of a profile file.
+        """
+        return cls(normalized_rows(
+            (row if isinstance(row, six.string_types) else '\t'.join(row) for row in rows),
+            '\t'))
+
+    @classmethod
+    def from_dict(cls, graphemes):
+        """
+        Create a profile from a dict mapping graphemes to dicts of column label to value,
+        e.g. {"aa": {"IPA": "aː"}}. Missing column values are set to "NULL".
+        """
+        labels = ["graphemes"]
+        for columns in graphemes.values():
+            for label in columns or {}:
+                if label not in labels:
+                    labels.append(label)
+        rows = [labels]
+        for grapheme, columns in graphemes.items():
+            columns = columns or {}
+            rows.append([grapheme] + [columns.get(label, "NULL") for label in labels[1:]])
+        return cls.from_rows(rows)
+
+
+def load_profile(profile):
+    """
+    Return profile as Profile instance.
+
+    Parameters
+    ----------
+    profile : Profile, str, dict or iterable
+        A Profile, the filename of an orthography profile, a dict as accepted by
+        Profile.from_dict or an iterable of rows as accepted by Profile.from_rows.
+    """
+    if isinstance(profile, Profile):
+        return profile
+    if isinstance(profile, six.string_types):
+        return Profile.from_file(profile)
+    if isinstance(profile, dict):
+        return Profile.from_dict(profile)
+    return Profile.from_rows(profile)
@@ -0,0 +1,268 @@
+"""
+Parsing, static analysis and compilation of orthography profile rules files.
+
+A rules file lists one rule per line as regular expression and replacement, separated by
+the last comma in the line. Rules are applied in order, see Tokenizer.rules.
+"""
+from __future__ import unicode_literals, print_function
+import codecs
+import unicodedata
+
+import regex as re
+
+# Characters which make a pattern more than a literal string.
+_META = set('.^$*+?{}[]\\|()')
+
+_REPEAT = re.compile(r'\{(\d*)(,?)(\d*)\}')
+
+
+class Rule(object):
+    """
+    A rule from an orthography profile rules file.
+
+    Parameters
+    ----------
+
+    pattern : str
+        The regular expression to replace.
+
+    replacement : str
+        The replacement, as accepted by regex.sub.
+
+    lineno : int (default = None)
+        The line number of the rule in the rules file.
+    """
+
+    def __init__(self, pattern, replacement, lineno=None):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.lineno = lineno
+        self.regex = re.compile(pattern)
+
+    def __repr__(self):
+        return '<Rule %s: %r -> %r>' % (self.lineno, self.pattern, self.replacement)
+
+    @property
+    def is_literal(self):
+        """
+        Whether pattern and replacement are plain strings, without any regex syntax.
+        """
+        return not _META.intersection(self.pattern) and '\\' not in self.replacement
+
+    def cost(self):
+        """
+        Return a static estimate of the relative cost of applying the rule.
+
+        Literal patterns cost 1. Unbounded quantifiers, alternations, backreferences and
+        lookarounds add to the cost, patterns prone to catastrophic backtracking multiply it.
+        """
+        if self.is_literal:
+            return 1
+        info = _scan(self.pattern)
+        cost = 1 + 2 * info['unbounded'] + info['alternations'] + 5 * info['backtracking_refs']
+        if info['nested'] or info['quantified_alternations']:
+            cost *= 10
+        if info['wildcards'] > 1:
+            cost *= info['wildcards']
+        return cost
+
+
+def parse_rules(filename):
+    """
+    Read the rules from a rules file. Blank lines and "#" comments are skipped.
+
+    Returns
+    -------
+    result : list of Rule
+
+    """
+    rules = []
+    with codecs.open(filename, 'r', 'utf8') as fp:
+        for lineno, line in enumerate(fp, start=1):
+            line = unicodedata.normalize('NFD', line.strip())
+            if not line or line.startswith('#'):
+                continue
+            pattern, sep, replacement = line.rpartition(',')
+            if not sep:
+                raise ValueError('%s:%s: rule without replacement' % (filename, lineno))
+            rules.append(Rule(pattern.strip(), replacement.strip(), lineno))
+    return rules
+
+
+def compile_rules(rules):
+    """
+    Compile rules into a list of (pattern, replacement) pairs to be applied in order.
+
+    Runs of consecutive literal rules which cannot interact are combined into a single
+    alternation, with a function as replacement. Applying the result gives the same output
+    as applying each rule in turn.
+    """
+    result = []
+    group = []
+
+    def flush():
+        if len(group) == 1:
+            result.append((group[0].regex, group[0].replacement))
+        elif group:
+            table = {rule.pattern: rule.replacement for rule in group}
+            result.append((
+                re.compile('|'.join(re.escape(rule.pattern) for rule in group)),
+                lambda match: table[match.group()]))
+        del group[:]
+
+    for rule in rules:
+        if not _combinable(rule) or not all(_independent(other, rule) for other in group):
+            flush()
+        group.append(rule)
+        if not _combinable(rule):
+            flush()
+    flush()
+    return result
+
+
+def _combinable(rule):
+    return rule.is_literal and rule.pattern and rule.replacement
+
+
+def _independent(first, second):
+    # Rules which match disjoint sets of characters never compete for the same text. If the
+    # replacement of the first rule shares no character with the pattern of the second,
+    # applying the first cannot create new matches for the second. Empty replacements are
+    # excluded by _combinable, since deletions can create matches by joining the context.
+    return not set(first.pattern).intersection(second.pattern) \
+        and not set(first.replacement).intersection(second.pattern)
+
+
+def analyze(rules, alphabet=None):
+    """
+    Check rules for problems.
+
+    Reports rules shadowed by an earlier rule with the same pattern (unless a rule in
+    between may feed them; regex patterns only as possibly shadowed), patterns prone to
+    catastrophic backtracking and which rules may feed later ones. If alphabet, the
+    characters which may occur in the input, is given, literal rules which can never match
+    are reported as well.
+
+    Returns
+    -------
+    result : list of (Rule, str) pairs
+        The rules and messages, in the order of the rules.
+
+    """
+    result = []
+    available = None
+    if alphabet is not None:
+        available = set(alphabet) | set(' #')
+
+    for i, rule in enumerate(rules):
+        for j, earlier in enumerate(rules[:i]):
+            # the earlier rule removes all matches, unless it or a rule in between may
+            # create new ones. For regex patterns this cannot be ruled out, since replaced
+            # text may form new matches with its context, e.g. through lookarounds.
+            if earlier.pattern == rule.pattern \
+                    and all(_may_feed(other, rule) is False for other in rules[j:i]):
+                result.append((rule, '%sshadowed by the rule in line %s' % (
+                    '' if not _META.intersection(rule.pattern) else 'possibly ',
+                    earlier.lineno)))
+                break
+
+        if available is not None:
+            if rule.is_literal and not available.issuperset(rule.pattern):
+                result.append((rule, 'can never match, characters %s do not occur in the input'
+                               % ''.join(sorted(set(rule.pattern) - available))))
+            available.update(rule.replacement)
+
+        info = _scan(rule.pattern)
+        if info['nested']:
+            result.append((rule, 'nested quantifiers may cause catastrophic backtracking'))
+        if info['quantified_alternations']:
+            result.append((rule, 'quantified alternation may cause catastrophic backtracking'))
+        if info['wildcards'] > 1:
+            result.append((rule, 'multiple unbounded wildcards cause polynomial backtracking'))
+
+        for later in rules[i + 1:]:
+            if _may_feed(rule, later):
+                result.append((rule, 'may feed the rule in line %s' % later.lineno))
+    return result
+
+
+def _may_feed(rule, later):
+    """
+    Return whether applying rule may create matches for later, or None if this cannot be
+    told, i.e. for deletions, which join their context, and replacements with references.
+    """
+    if not rule.replacement or '\\' in rule.replacement:
+        return None
+    if later.regex.search(rule.replacement):
+        return True
+    # a replacement may also complete a match of a literal pattern together with its
+    # context; for other patterns the characters of the source say nothing about matches
+    return not _META.intersection(later.pattern) \
+        and bool(set(rule.replacement).intersection(later.pattern))
+
+
+def _scan(pattern):
+    """
+    Scan pattern for features relevant to the cost of matching it.
+    """
+    info = {
+        'unbounded': 0,
+        'alternations': 0,
+        'backtracking_refs': 0,
+        'wildcards': 0,
+        'nested': False,
+        'quantified_alternations': 0,
+    }
+    # per open group: [contains an unbounded quantifier, contains an alternation]
+    stack = [[False, False]]
+    closed = None  # the group closed by the previous token
+    prev = None
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        token, group, i = c, None, i + 1
+        if c == '\\':
+            nxt = pattern[i:i + 1]
+            if nxt.isdigit() or nxt == 'g':
+                info['backtracking_refs'] += 1
+            i += 1
+        elif c == '[':
+            # skip the character class, a leading "]" (or "^]") is a literal
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < n and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            i += 1
+        elif c == '(':
+            if pattern[i:i + 2] in ('?=', '?!') or pattern[i:i + 3] in ('?<=', '?<!'):
+                info['backtracking_refs'] += 1
+            stack.append([False, False])
+        elif c == ')' and len(stack) > 1:
+            group = stack.pop()
+            stack[-1][0] = stack[-1][0] or group[0]
+        elif c == '|':
+            info['alternations'] += 1
+            stack[-1][1] = True
+        elif c in '*+?' or (c == '{' and _REPEAT.match(pattern, i - 1)):
+            if c == '{':
+                m = _REPEAT.match(pattern, i - 1)
+                unbounded = bool(m.group(2)) and not m.group(3)
+                i = m.end()
+            else:
+                unbounded = c != '?'
+            if pattern[i:i + 1] in ('?', '+'):
+                # lazy or possessive quantifier
+                i += 1
+            if unbounded:
+                info['unbounded'] += 1
+                stack[-1][0] = True
+                if prev == '.':
+                    info['wildcards'] += 1
+                if closed:
+                    info['nested'] = info['nested'] or closed[0]
+                    if closed[1]:
+                        info['quantified_alternations'] += 1
+        closed, prev = group, token
+    return info
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Analyze an orthography profile rules file: report problematic rules and rule costs.
+
+Usage:
+  analyze_rules [options] <rulesfile>
+  analyze_rules -h | --help
+  analyze_rules --version
+
+Options:
+  --profile=<prf>  Orthography profile providing the input alphabet.
+  -h --help        Show this screen.
+  --version        Show version.
+"""
+from __future__ import unicode_literals, print_function
+
+from docopt import docopt
+
+from orthotokenizer.profile import load_profile
+from orthotokenizer.rules import parse_rules, compile_rules, analyze
+
+__version__ = "0.1.0"
+__author__ = "Steven Moran"
+__license__ = "MIT"
+
+
+def main():  # pragma: no cover
+    """Main entry point for the analyze_rules CLI."""
+    args = docopt(__doc__, version=__version__)
+    for line in analyze_rules(args['<rulesfile>'], profile=args['--profile']):
+        print(line)
+
+
+def analyze_rules(filename, profile=None):
+    """
+    Return the report on the rules in filename as list of lines.
+    """
+    alphabet = None
+    if profile:
+        profile = load_profile(profile)
+        alphabet = set()
+        for grapheme in profile:
+            alphabet.update(grapheme)
+            for label in profile.column_labels:
+                alphabet.update(profile.mappings.get((grapheme, label), ''))
+
+    rules = parse_rules(filename)
+    lines = ['line %s: %s' % (rule.lineno, message) for rule, message in analyze(rules, alphabet)]
+    lines.append('')
+    lines.append('%d rules, compiled into %d patterns' % (len(rules), len(compile_rules(rules))))
+    lines.append('')
+    lines.append('cost\tline\trule')
+    for rule in sorted(rules, key=lambda r: -r.cost()):
+        lines.append('%s\t%s\t%s, %s' % (rule.cost(), rule.lineno, rule.pattern, rule.replacement))
+    return lines
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import unittest
+from tempfile import mkdtemp
+from shutil import rmtree
+
+from orthotokenizer.tokenizer import Tokenizer
+import orthotokenizer.cache
+from orthotokenizer.cache import ResultCache, fingerprint
+
+
+def _test_path(fname):
+    return os.path.join(os.path.dirname(__file__), fname)
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = mkdtemp()
+        self.db = os.path.join(self.tmp, 'cache.sqlite')
+        self.t = Tokenizer(_test_path('test.prf'))
+
+    def tearDown(self):
+        rmtree(self.tmp, ignore_errors=True)
+
+    def test_tokenize(self):
+        forms = ["aabchonn-ih", "aa b", "aabchonn-ih"]
+        with ResultCache(self.db, self.t, "ipa") as cache:
+            self.assertEqual(cache.get_many(forms), {})
+            result = cache.tokenize(forms)
+            self.assertEqual(result, [self.t.tokenize(form, "ipa") for form in forms])
+
+        with ResultCache(self.db, self.t, "ipa") as cache:
+            self.assertEqual(len(cache.get_many(forms)), 2)
+            self.assertEqual(cache.tokenize(forms), result)
+
+    def test_invalidation(self):
+        with ResultCache(self.db, self.t) as cache:
+            cache.tokenize(["aab"])
+
+        t = Tokenizer([['graphemes'], ['a'], ['b']])
+        self.assertNotEqual(fingerprint(t), fingerprint(self.t))
+        self.assertNotEqual(fingerprint(self.t, "ipa"), fingerprint(self.t))
+
+        key = fingerprint(self.t)
+        orthotokenizer.cache.CACHE_VERSION += 1
+        try:
+            self.assertNotEqual(fingerprint(self.t), key)
+        finally:
+            orthotokenizer.cache.CACHE_VERSION -= 1
+        with ResultCache(self.db, t) as cache:
+            self.assertEqual(cache.get_many(["aab"]), {})
+            self.assertEqual(cache.tokenize(["aab"]), ["a a b"])
+            cache.purge()
+            self.assertEqual(cache.db.execute("SELECT count(*) FROM results").fetchone()[0], 1)
+
+    def test_limits(self):
+        t = Tokenizer(_test_path('test.prf'), max_parse_steps=10)
+        with ResultCache(self.db, t) as cache:
+            cache.tokenize(["aab", "aabchon"])
+            self.assertEqual(list(cache.get_many(["aab", "aabchon"])), ["aab"])
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import codecs
+import unittest
+
+from orthotokenizer.profile import Profile, load_profile
+from orthotokenizer.tokenizer import Tokenizer
+
+
+def _test_path(fname):
+    return os.path.join(os.path.dirname(__file__), fname)
+
+
+class ProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.profile = Profile.from_file(_test_path('test.prf'))
+
+    def test_from_file(self):
+        self.assertEqual(self.profile.column_labels, ['graphemes', 'ipa', 'xsampa'])
+        self.assertEqual(list(self.profile)[:3], ['a', 'aa', 'b'])
+        self.assertIn('ch', self.profile.graphemes)
+        self.assertEqual(self.profile.mappings['on', 'xsampa'], 'o~')
+
+    def test_from_rows(self):
+        with codecs.open(_test_path('test.prf'), 'r', 'utf8') as fp:
+            lines = fp.read().splitlines()
+        profile = load_profile(lines)
+        self.assertEqual(list(profile), list(self.profile))
+        self.assertEqual(profile.mappings, self.profile.mappings)
+
+        with self.assertRaises(Exception):
+            Profile.from_rows([['a'], ['a']])
+
+        # in-memory rows are parsed exactly like the lines of a file
+        self.assertEqual(list(Profile.from_rows(['\tfoo', ' # x', ''])), ['foo'])
+        self.assertEqual(list(Profile.from_rows([['', 'foo']])), ['foo'])
+
+    def test_from_dict(self):
+        profile = load_profile({'aa': {'IPA': 'aː'}, 'b': {}})
+        self.assertEqual(profile.column_labels, ['graphemes', 'ipa'])
+        self.assertEqual(profile.mappings['b', 'ipa'], 'NULL')
+
+    def test_tokenizer(self):
+        t = Tokenizer([['graphemes', 'IPA'], ['aa', 'aː'], ['ch', 'tʃ'], ['b', 'b']])
+        self.assertEqual(t.transform('aabch', 'ipa'), 'aː b tʃ')
+        self.assertIsNone(t.orthography_profile_rules)
+        self.assertEqual(Tokenizer(self.profile).transform('aabch', 'ipa'), 'aː b tʃ')
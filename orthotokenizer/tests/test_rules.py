@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import unittest
+
+from orthotokenizer.rules import Rule, parse_rules, compile_rules, analyze
+
+
+def _test_path(fname):
+    return os.path.join(os.path.dirname(__file__), fname)
+
+
+def _apply(compiled, string):
+    for pattern, replacement in compiled:
+        string = pattern.sub(replacement, string)
+    return string
+
+
+class RulesTestCase(unittest.TestCase):
+    def test_parse_rules(self):
+        rules = parse_rules(_test_path('test.rules'))
+        self.assertEqual(
+            [(r.pattern, r.replacement, r.lineno) for r in rules],
+            [('a{2}', 'b', 9), ('bb', 'c', 10), ('c.*n', 'ii', 11), ('h', 'i', 12)])
+        self.assertEqual(Rule('a{1,2}', 'b').regex.sub('b', 'aaa'), 'bb')
+
+    def test_compile_rules(self):
+        rules = [
+            Rule('p', 'b'),
+            Rule('t', 'd'),
+            Rule('k', 'g'),
+            Rule('d', 'x'),  # fed by t -> d, must not be combined with it
+            Rule('s', ''),
+            Rule('q+', 'k'),
+            Rule('ng', 'N'),
+            Rule('r', 'l'),
+        ]
+        compiled = compile_rules(rules)
+        self.assertEqual(len(compiled), 5)
+        for string in ['pataka', 'dqqqs ngr', 'tdsk']:
+            self.assertEqual(_apply(compiled, string), _apply(compile_rules([]) + [
+                (rule.regex, rule.replacement) for rule in rules], string))
+
+    def test_analyze(self):
+        rules = [
+            Rule('a', 'b', 1),
+            Rule('(a|aa)+c', 'x', 2),
+            Rule('a', 'c', 3),
+            Rule('((x)+)*', 'y', 4),
+            Rule('.*b.*', 'z', 5),
+            Rule('q', 'r', 6),
+        ]
+        messages = [(rule.lineno, message.split()[0]) for rule, message in analyze(rules, 'abc')]
+        self.assertIn((1, 'may'), messages)
+        self.assertIn((2, 'quantified'), messages)
+        self.assertIn((3, 'shadowed'), messages)
+        self.assertIn((4, 'nested'), messages)
+        self.assertIn((5, 'multiple'), messages)
+        self.assertIn((6, 'can'), messages)
+        self.assertEqual(rules[0].cost(), 1)
+        self.assertGreater(rules[1].cost(), rules[4].cost())
+
+        # rule 2 recreates the pattern of rules 1 and 3
+        rules = [Rule('a', 'b', 1), Rule('b', 'a', 2), Rule('a', 'c', 3)]
+        self.assertNotIn('shadowed', ' '.join(message for _, message in analyze(rules)))
+        rules = [Rule('ab', 'a', 1), Rule('ab', 'c', 2)]
+        self.assertNotIn('shadowed', ' '.join(message for _, message in analyze(rules)))
+        # regex syntax characters in the pattern source are not matches
+        self.assertEqual(analyze([Rule('p', 'a', 1), Rule('[^a]', 'x', 2)]), [])
+        # the first rule turns "xbb" into "xxb", where the second one matches again
+        rules = [Rule('(?<=x)b', 'x', 1), Rule('(?<=x)b', 'x', 2)]
+        self.assertEqual(rules[1].regex.sub('x', rules[0].regex.sub('x', 'xbb')), 'xxx')
+        self.assertEqual(
+            [message for _, message in analyze(rules)],
+            ['possibly shadowed by the rule in line 1'])
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import os
+import unittest
+
+
+class TestAnalyzeRules(unittest.TestCase):
+    def test_analyze_rules(self):
+        from orthotokenizer.scripts.analyze_rules import analyze_rules
+
+        lines = analyze_rules(
+            os.path.join(os.path.dirname(__file__), 'test.rules'),
+            profile=os.path.join(os.path.dirname(__file__), 'test.prf'))
+        self.assertIn('line 9: may feed the rule in line 10', lines)
+        self.assertIn('4 rules, compiled into 4 patterns', lines)
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 import os
+import sys
 import codecs
 import unittest
+import regex as re
+from orthotokenizer import tokenizer
 from orthotokenizer.tokenizer import Tokenizer
+from orthotokenizer.profile import Profile
 from orthotokenizer.tree import printMultigraphs
 
 
@@ -31,6 +35,42 @@ class TokenizerTestCase(unittest.TestCase):
         printMultigraphs(self.t.tree.root, '', '')
         printMultigraphs(self.t.tree.root, 'abcd', '')
 
+    def test_sizeOf(self):
+        from orthotokenizer.tree import _NO_CHILDREN
+
+        class DictNode(object):
+            # the node layout before TreeNode used __slots__
+            def __init__(self, char, sentinel=False):
+                self.char = char
+                self.children = {}
+                self.sentinel = sentinel
+
+        root = DictNode('', sentinel=True)
+        for grapheme in self.t.profile:
+            node = root
+            for char in grapheme:
+                node = node.children.setdefault(char, DictNode(char))
+            node.sentinel = True
+
+        baseline, nodes = 0, [root]
+        while nodes:
+            node = nodes.pop()
+            baseline += sys.getsizeof(node) + sys.getsizeof(node.__dict__) \
+                + sys.getsizeof(node.children)
+            baseline += sum(sys.getsizeof(char) for char in node.children)
+            nodes.extend(node.children.values())
+
+        self.assertLess(self.t.tree.sizeOf(), baseline)
+        self.assertFalse(hasattr(self.t.tree.root, '__dict__'))
+        self.assertIs(self.t.tree.root.children['b'].children, _NO_CHILDREN)
+        self.assertIs(self.t.tree.root.children['a'].children['a'].children, _NO_CHILDREN)
+
+    def test_singles(self):
+        self.assertIn('b', self.t.tree.singles)
+        self.assertNotIn('a', self.t.tree.singles)
+        self.assertEqual(self.t.tree.graphemes('b' * 5000 + 'aab'), ['b'] * 5000 + ['aa', 'b'])
+        self.assertIsNone(self.t.tree.graphemes('bbbo'))
+
     def test_kabiye(self):
         t = Tokenizer()
         input, gold = jipa("Kabiye_input.txt", "Kabiye_output.txt")
@@ -96,3 +136,65 @@ class TokenizerTestCase(unittest.TestCase):
     def test_find_missing_characters(self):
         result = self.t.find_missing_characters("aa b ch on n - ih x y z")
         self.assertEqual(result, "aa b ch on n - ih ? ? ?")
+
+    def test_tokenize_columns(self):
+        def words(col, i):
+            return [
+                col['tokens'][col['word_offsets'][j]:col['word_offsets'][j + 1]]
+                for j in range(col['form_offsets'][i], col['form_offsets'][i + 1])]
+
+        forms = ["aabchonn-ih", "aa b", "xy", "xh xb", "  a -  b ", "", " "]
+        tokenizers = [
+            (self.t, ["graphemes", "IPA", "xsampa"]),
+            (Tokenizer(Profile.from_file(_test_path('test.prf'))), ["graphemes", "IPA"]),
+            (Tokenizer(), ["graphemes"]),
+        ]
+        for t, columns in tokenizers:
+            result = t.tokenize_columns(forms, columns)
+            for column in columns:
+                col = result[column.lower()]
+                self.assertEqual(len(col['form_offsets']), len(forms) + 1)
+                for i, form in enumerate(forms):
+                    string = t.tokenize(form, column)
+                    expected = [w.split() for w in string.split("#")] if string else []
+                    self.assertEqual(words(col, i), expected)
+
+        # failed parses keep their word boundaries
+        self.assertEqual(self.t.graphemes("xh xb"), "? ? # ? b")
+
+        result = self.t.tokenize_columns(["aab"], ["ipa", "IPA"])
+        self.assertEqual(list(result), ["ipa"])
+        self.assertEqual(result["ipa"]['form_offsets'].tolist(), [0, 1])
+
+        t = Tokenizer()
+        result = t.tokenize_columns(["ĉh á"])['graphemes']
+        self.assertEqual(result['tokens'], t.grapheme_clusters("ĉhá").split())
+        self.assertEqual(result['word_offsets'].tolist(), [0, 2, 3])
+
+    def test_limits(self):
+        t = Tokenizer(_test_path('test.prf'), max_parse_steps=10)
+        self.assertEqual(t.graphemes("ch aab"), "ch # aa b")
+        self.assertEqual(t.graphemes("aabchon"), "a a b c ? ? n")
+        self.assertEqual(" ".join(t.tokenize_columns(["aabchon"])['graphemes']['tokens']),
+                         t.tokenize("aabchon"))
+        self.assertEqual(t.limits_exceeded['parse'], 3)
+
+        # long words must neither exhaust the stack nor backtrack exponentially
+        t = Tokenizer(_test_path('test.prf'), max_parse_steps=1000)
+        self.assertEqual(t.graphemes('a' * 3000), " ".join('a' * 3000))
+        self.assertEqual(t.limits_exceeded['parse'], 1)
+        t = Tokenizer(_test_path('test.prf'))
+        self.assertEqual(t.graphemes('a' * 3000), " ".join(['aa'] * 1500))
+        self.assertEqual(t.graphemes('aa' * 1500 + 'x'), " ".join('a' * 3000 + '?'))
+
+        supported = tokenizer._regex_timeout_supported
+        tokenizer._regex_timeout_supported = lambda: False
+        try:
+            self.assertRaises(ValueError, Tokenizer, _test_path('test.prf'), rules_timeout=1)
+        finally:
+            tokenizer._regex_timeout_supported = supported
+
+        t = Tokenizer(_test_path('test.prf'), rules_timeout=0.01)
+        t.op_rules.insert(0, (re.compile("(a|aa)+c"), "x"))
+        self.assertEqual(t.rules("a" * 50 + "b"), "a" * 50 + "b")
+        self.assertEqual(t.limits_exceeded['rules'], 1)
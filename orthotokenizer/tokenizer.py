@@ -5,11 +5,34 @@ Tokenizer of Unicode characters, grapheme clusters and tailored grapheme cluster
 """
 from __future__ import unicode_literals, division, absolute_import, print_function
 import os
+import logging
+import collections
+from array import array
 import unicodedata
 import regex as re
+import six
+
+from orthotokenizer.profile import load_profile
+from orthotokenizer.rules import parse_rules, compile_rules
+from orthotokenizer.tree import Tree, ParseLimitExceeded
+from orthotokenizer.util import normalized_string
+
+log = logging.getLogger(__name__)
+
+
+def _offsets():
+    # int32 offsets as used by Arrow list arrays; Python 2 does not accept unicode typecodes.
+    return array(str('i'), [0])
+
+
+def _regex_timeout_supported():
+    # The timeout keyword was added in regex 2019.3.12, and only to its Python 3 version.
+    try:
+        re.compile('').sub('', '', timeout=1)
+    except TypeError:
+        return False
+    return True
 
-from orthotokenizer.tree import Tree
-from orthotokenizer.util import normalized_rows, normalized_string
 
 class Tokenizer(object):
     """
@@ -22,10 +45,24 @@ class Tokenizer(object):
 
     orthography_profile : string (default = None)
         Filename of the a document source-specific orthography profile and rules file.
+        May also be an in-memory profile, i.e. anything accepted by
+        orthotokenizer.profile.load_profile.
 
     orthography_profile_rules : string (default = None)
         Filename of the a document source-specific orthography profile rules file.
 
+    max_parse_steps : int (default = None)
+        Maximal number of trie lookups to parse a single word. Words exceeding the limit
+        are tokenized into characters, with characters not in the profile replaced by "?",
+        just like words which cannot be parsed.
+
+    rules_timeout : float (default = None)
+        Timeout in seconds for each rule applied to a string. If a rule times out, the
+        string is returned without any rules applied. Requires Python 3 and regex 2019.3.12
+        or later.
+
+    Exceeding either limit is counted in the attribute limits_exceeded and logged.
+
     Notes
     -----
     The tokenizer can be used for pure Unicode character and grapheme
@@ -81,9 +118,19 @@ class Tokenizer(object):
     """
     grapheme_pattern = re.compile("\X", re.UNICODE)
 
-    def __init__(self, orthography_profile=None, orthography_profile_rules=None):
+    def __init__(self, orthography_profile=None, orthography_profile_rules=None,
+                 max_parse_steps=None, rules_timeout=None):
         self.orthography_profile = orthography_profile
         self.orthography_profile_rules = orthography_profile_rules
+        self.max_parse_steps = max_parse_steps
+        self.rules_timeout = rules_timeout
+        if rules_timeout is not None and not _regex_timeout_supported():
+            raise ValueError(
+                "rules_timeout requires Python 3 and regex 2019.3.12 or later")
+
+        # count of inputs for which max_parse_steps or rules_timeout were exceeded
+        self.limits_exceeded = collections.Counter()
+        self.profile = None
         self.tree = None
 
         # store column labels from the orthography profile
@@ -97,46 +144,24 @@ class Tokenizer(object):
 
         # orthography profile processing
         if self.orthography_profile:
-            # read in orthography profile and create a trie structure for tokenization
-            self.tree = Tree(self.orthography_profile)
-            # process the orthography profiles and rules
-            self._init_profile()
-
-        if not self.orthography_profile_rules and self.orthography_profile:
+            # read in the orthography profile once and create a trie structure for
+            # tokenization from it
+            self.profile = load_profile(self.orthography_profile)
+            self.tree = Tree(self.profile)
+            self.column_labels = self.profile.column_labels
+            self.mappings = self.profile.mappings
+            self.op_graphemes = self.profile.graphemes
+
+        if not self.orthography_profile_rules \
+                and isinstance(self.orthography_profile, six.string_types):
             rules_path = os.path.splitext(self.orthography_profile)[0] + '.rules'
             if os.path.exists(rules_path):
                 self.orthography_profile_rules = rules_path
 
         # orthography profile rules and replacements
         if self.orthography_profile_rules:
-            self.op_rules = []
-            for rule, replacement in normalized_rows(self.orthography_profile_rules, ','):
-                self.op_rules.append((re.compile(rule), replacement))
-
-    def _init_profile(self):
-        """
-        Process and initialize data structures given an orthography profile.
-        """
-        for tokens in normalized_rows(self.orthography_profile, '\t'):
-            # deal with the columns header -- should always start with "graphemes" as per the orthography profiles specification
-            if tokens[0].lower().startswith("graphemes"):
-                self.column_labels.extend([token.lower() for token in tokens])
-                continue
-
-            grapheme = tokens[0]
-
-            # check for duplicates in the orthography profile (fail if dups)
-            if grapheme not in self.op_graphemes:
-                self.op_graphemes[grapheme] = 1
-            else:
-                raise Exception("You have a duplicate in your orthography profile.")
-
-            if len(tokens) == 1:
-                continue
-
-            self.mappings.update(
-                {(grapheme, label): token
-                 for token, label in zip(tokens, self.column_labels)})
+            self.parsed_rules = parse_rules(self.orthography_profile_rules)
+            self.op_rules = compile_rules(self.parsed_rules)
 
     def characters(self, string):
         """
@@ -205,19 +230,7 @@ class Tokenizer(object):
         if not self.orthography_profile:
             return self.grapheme_clusters(string)
 
-        parses = []
-        for word in normalized_string(string, add_boundaries=False).split():
-            parse = self.tree.parse(word)
-
-            # case where the parsing fails
-            if not parse:
-                # replace characters in string but not in orthography profile with <?>
-                parse = " " + self.find_missing_characters(self.characters(word))
-
-            parses.append(parse)
-
-        # remove the outer word boundaries
-        return "".join(parses).replace("##", "#").rstrip("#").lstrip("#").strip()
+        return self._join_words(self._word_graphemes(string))
 
     def transform(self, string, column="graphemes"):
         """
@@ -296,6 +309,117 @@ class Tokenizer(object):
         if not self.orthography_profile and self.orthography_profile_rules:
             return self.rules(self.grapheme_clusters(string))
 
+    def tokenize_columns(self, forms, columns=("graphemes",)):
+        """
+        Tokenize a batch of forms into flat, columnar token arrays.
+
+        Each form is parsed once; the result is then mapped to every requested profile
+        column. Per column, the tokens of all forms are stored in one flat list with two
+        offset arrays, in the layout of nested Arrow list arrays:
+
+        - tokens[word_offsets[i]:word_offsets[i + 1]] are the tokens of word i,
+        - words form_offsets[j] to form_offsets[j + 1] belong to form j.
+
+        The offset arrays are int32 array.array objects which can be passed to
+        numpy.frombuffer or pyarrow.ListArray.from_arrays without copying.
+
+        The words of a form are those of tokenize(form, column), i.e. its result split on
+        "#" and then on whitespace; if tokenize returns an empty string, the form has no
+        words. Unlike the string, the token arrays keep profile values which contain
+        whitespace or "#" as single tokens.
+
+        Parameters
+        ----------
+        forms : iterable of str
+            The input strings to be tokenized.
+
+        columns : iterable of str (default = ("graphemes",))
+            The column labels for the transformation, as in tokenize.
+
+        Returns
+        -------
+        result : dict
+            Maps each column label to a dict with keys "tokens", "word_offsets" and
+            "form_offsets".
+
+        """
+        # labels are case insensitive; keep the first occurrence of each
+        labels = []
+        for column in columns:
+            if column.lower() not in labels:
+                labels.append(column.lower())
+        columns = labels
+        result = {
+            column: {
+                'tokens': [], 'word_offsets': _offsets(), 'form_offsets': _offsets()}
+            for column in columns}
+
+        for form in forms:
+            words = self._word_graphemes(form)
+            for column in columns:
+                col = result[column]
+                transformed = self._transform_words(words, column)
+                if transformed == [[]]:
+                    # tokenize returns an empty string, i.e. there are no words
+                    transformed = []
+                for word in transformed:
+                    col['tokens'].extend(word)
+                    col['word_offsets'].append(len(col['tokens']))
+                col['form_offsets'].append(len(col['word_offsets']) - 1)
+        return result
+
+    def _word_graphemes(self, string):
+        """
+        Return the grapheme tokenization of string as list of words, each a list of graphemes.
+        """
+        if not self.orthography_profile:
+            # keep the word boundaries grapheme_clusters adds for every space
+            return [word.split() for word in self.grapheme_clusters(string).split("#")]
+
+        result = []
+        for word in normalized_string(string, add_boundaries=False).split():
+            try:
+                graphemes = self.tree.graphemes(word, max_steps=self.max_parse_steps)
+            except ParseLimitExceeded:
+                self._limit_exceeded('parse', word)
+                graphemes = None
+            if graphemes is None:
+                # replace characters in string but not in orthography profile with <?>
+                graphemes = [c if c in self.op_graphemes else "?" for c in word]
+            result.append(graphemes)
+        return result
+
+    @staticmethod
+    def _join_words(words):
+        """
+        Return words as space-delimited string with "#" marking the word boundaries.
+        """
+        tokens = []
+        for i, word in enumerate(words):
+            if i:
+                tokens.append("#")
+            tokens.extend(word)
+        return " ".join(tokens)
+
+    def _transform_words(self, words, column):
+        """
+        Apply the column transformation and the orthography profile rules to words as
+        returned by _word_graphemes, like tokenize does for the string representation.
+        """
+        if self.orthography_profile and column != "graphemes" and column in self.column_labels:
+            words = [
+                [target for target in (
+                    '?' if token == '?' else self.mappings[token, column] for token in word)
+                 if target != "NULL"]
+                for word in words]
+
+        if self.orthography_profile_rules:
+            # rules operate on the string representation, so we have to round trip here.
+            string = self.rules(self._join_words(words))
+            words = [word.split() for word in string.split("#")]
+
+        return words
+
     def transform_rules(self, string):
         """
         Convenience function that first tokenizes a string into orthographic profile-
@@ -323,13 +447,37 @@ class Tokenizer(object):
             return string
 
         result = normalized_string(string, add_boundaries=False)
-        for rule, replacement in self.op_rules:
-            result = rule.sub(replacement, result)
+        if self.rules_timeout is not None:
+            result = self._timed_rules(result)
+        else:
+            for rule, replacement in self.op_rules:
+                result = rule.sub(replacement, result)
 
         # this is in case someone introduces a non-NFD ordered sequence of characters
         # in the orthography profile
         return normalized_string(result, add_boundaries=False)
 
+    def _timed_rules(self, string):
+        """
+        Apply the orthography profile rules with rules_timeout to the normalized string.
+        """
+        result = string
+        for rule, replacement in self.op_rules:
+            try:
+                result = rule.sub(replacement, result, timeout=self.rules_timeout)
+            except TimeoutError:
+                # don't apply a partial rule set, but return the input unchanged
+                self._limit_exceeded('rules', string)
+                return string
+        return result
+
+    def _limit_exceeded(self, kind, string):
+        """
+        Record that parsing or rule application of string hit the configured limit.
+        """
+        self.limits_exceeded[kind] += 1
+        log.warning("%s limit exceeded, falling back for input: %.50r", kind, string)
+
     def find_missing_characters(self, char_tokenized_string):
         """
         Given a string tokenized into characters, return a characters
@@ -1,67 +1,137 @@
 from __future__ import unicode_literals, print_function
+import sys
 
-from orthotokenizer.util import normalized_rows
+from orthotokenizer.profile import load_profile
+
+# Shared, never mutated, children mapping of all leaf nodes. A node gets a dict of its
+# own only when the first child is added to it, see Tree.__init__.
+_NO_CHILDREN = {}
+
+
+class ParseLimitExceeded(Exception):
+    """
+    Raised when parsing a line exceeds the given step budget.
+    """
 
 
 class TreeNode(object):
     """
     Private class that creates the tree data structure from the orthography profile for parsing.
+
+    Nodes do not store their own character -- it is the key under which the node is stored
+    in its parent's children -- and use __slots__ to avoid a per-instance __dict__.
     """
+    __slots__ = ('children', 'sentinel')
 
-    def __init__(self, char, sentinel=False):
-        self.char = char
-        self.children = {}
+    def __init__(self, sentinel=False):
+        self.children = _NO_CHILDREN
         self.sentinel = sentinel
 
 
 class Tree(object):
-    def __init__(self, filename):
+    def __init__(self, profile):
         # Internal function to add a multigraph starting at node.
         def addMultigraph(node, line):
             for char in line:
-                node = node.children.setdefault(char, TreeNode(char))
+                child = node.children.get(char)
+                if child is None:
+                    if node.children is _NO_CHILDREN:
+                        node.children = {}
+                    child = node.children[char] = TreeNode()
+                node = child
             node.sentinel = True
 
-        # Add all multigraphs in each line of file_name.
-        # Skip "#" comments and blank lines.
-        self.root = TreeNode('', sentinel=True)
-
-        for i, tokens in enumerate(normalized_rows(filename, '\t')):
-            if i == 0 and tokens[0].lower().startswith("graphemes"):
-                # deal with the columns header -- should always start with "graphemes" as
-                # per the orthography profiles specification
+        # Add all multigraphs of the profile, which may be given as filename or anything
+        # else accepted by load_profile.
+        self.root = TreeNode(sentinel=True)
+
+        for grapheme in load_profile(profile):
+            addMultigraph(self.root, grapheme)
+
+        # Single character graphemes which are not the first character of any multigraph.
+        self.singles = frozenset(
+            char for char, node in self.root.children.items()
+            if node.sentinel and node.children is _NO_CHILDREN)
+
+    def parse(self, line, max_steps=None):
+        graphemes = self.graphemes(line, max_steps=max_steps)
+        return "# " + " ".join(graphemes + ["#"]) if graphemes is not None else ""
+
+    def graphemes(self, line, max_steps=None):
+        """
+        Return the list of graphemes of the longest-match parse of line or None, if line
+        cannot be parsed.
+
+        If max_steps is given, ParseLimitExceeded is raised when parsing needs more than
+        max_steps trie lookups, e.g. for very long words.
+        """
+        return self._parse(line, max_steps)
+
+    def _parse(self, line, max_steps):
+        # The parse takes at each position the longest grapheme after which the rest of the
+        # line can still be parsed. Going from the end of the line to its start, we record
+        # this grapheme for every position, so each position is visited exactly once,
+        # without recursion or backtracking.
+        end = len(line)
+        # longest[pos] is the end of the grapheme chosen at pos, or 0 if line[pos:] cannot
+        # be parsed.
+        longest = [0] * end + [end]
+        singles = self.singles
+        root = self.root
+        steps = 0
+        for start in range(end - 1, -1, -1):
+            # Fast path: a character which is a grapheme but does not start any multigraph
+            # can only be parsed as itself.
+            if line[start] in singles:
+                steps += 1
+                if max_steps is not None and steps > max_steps:
+                    raise ParseLimitExceeded(line)
+                if longest[start + 1]:
+                    longest[start] = start + 1
                 continue
 
-            addMultigraph(self.root, tokens[0])
-
-    def parse(self, line):
-        parse = self._parse(self.root, line)
-        return "# " + parse if parse else ""
-
-    def _parse(self, root, line):
-        # Base (or degenerate..) case.
-        if len(line) == 0:
-            return "#"
-
-        parse = ""
-        curr = 0
-        node = root
-        while curr < len(line):
-            node = node.children.get(line[curr])
-            curr += 1
-            if not node:
-                break
-            if node.sentinel:
-                subparse = self._parse(root, line[curr:])
-                if len(subparse) > 0:
-                    # Always keep the latest valid parse, which will be
-                    # the longest-matched (greedy match) graphemes.
-                    parse = line[:curr] + " " + subparse
-
-        # Note that if we've reached EOL, but not end of valid grapheme,
-        # this will be an empty string.
+            node = root
+            curr = start
+            while curr < end:
+                steps += 1
+                if max_steps is not None and steps > max_steps:
+                    raise ParseLimitExceeded(line)
+                node = node.children.get(line[curr])
+                curr += 1
+                if not node:
+                    break
+                if node.sentinel and longest[curr]:
+                    # Always keep the latest valid end, which will be
+                    # the longest-matched (greedy match) grapheme.
+                    longest[start] = curr
+
+        if end and not longest[0]:
+            return None
+
+        parse = []
+        start = 0
+        while start < end:
+            parse.append(line[start:longest[start]])
+            start = longest[start]
         return parse
 
+    def sizeOf(self):
+        """
+        Return the approximate memory footprint of the trie in bytes, i.e. the size of all
+        nodes, their children dicts and the characters used as keys.
+        """
+        size = 0
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            size += sys.getsizeof(node)
+            if node.children is not _NO_CHILDREN:
+                size += sys.getsizeof(node.children)
+                for char, child in node.children.items():
+                    size += sys.getsizeof(char)
+                    nodes.append(child)
+        return size
+
     def printTree(self, root, path=''):
         for char, child in root.children.items():
             if child.sentinel:
@@ -2,9 +2,17 @@ from __future__ import print_function
 import codecs
 import unicodedata
 
+import six
 
-def normalized_rows(path, separator, skip_comments=True):
-    for line in codecs.open(path, 'r', 'utf8'):
+
+def normalized_rows(lines, separator, skip_comments=True):
+    """
+    Yield the NFD-normalized, non-blank lines, split on separator if given. lines may be a
+    filename or an iterable of lines.
+    """
+    if isinstance(lines, six.string_types):
+        lines = codecs.open(lines, 'r', 'utf8')
+    for line in lines:
         line = unicodedata.normalize('NFD', line.strip())
         if line and (not skip_comments or not line.startswith('#')):
             if separator:
@@ -61,6 +61,7 @@ setup(
     entry_points={
         'console_scripts': [
             "create_profiles = orthotokenizer.scripts.create_profiles:main",
+            "analyze_rules = orthotokenizer.scripts.analyze_rules:main",
             "tokenize = orthotokenizer.scripts.tokenize:main",
         ]
     },